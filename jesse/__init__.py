@@ -394,6 +394,14 @@ if HAS_LIVE_TRADE_PLUGIN:
         GetLogsRequestJson, GetOrdersRequestJson
     from jesse.services import auth as authenticator
 
+    def run_live_session(*args) -> None:
+        # runs in the process of the live session, so the database is prepared there
+        from jesse.services.db import bootstrap
+        bootstrap()
+
+        from jesse_live import live_mode
+        live_mode.run(*args)
+
     @fastapi_app.post("/live")
     def live(request_json: LiveRequestJson, authorization: Optional[str] = Header(None)) -> JSONResponse:
         if not authenticator.is_valid_token(authorization):
@@ -407,13 +415,12 @@ if HAS_LIVE_TRADE_PLUGIN:
         validate_cwd()
 
         # execute live session
-        from jesse_live import live_mode
         from jesse.services.multiprocessing import process_manager
 
         trading_mode = 'livetrade' if request_json.paper_mode is False else 'papertrade'
 
         process_manager.add_task(
-            live_mode.run,
+            run_live_session,
             f'{trading_mode}-' + str(request_json.id),
             request_json.debug_mode,
             dev_mode,
@@ -150,10 +150,32 @@ def set_config(conf: dict) -> None:
     # TODO: must become a config value later when we go after multi account support?
     config['env']['identifier'] = 'main'
 
+    _publish_notification_flags()
+
 
 def reset_config() -> None:
     global config
     config = backup_config.copy()
+    # the nested dicts are shared with backup_config, so drop the live-only notifications
+    config['env'].pop('notifications', None)
+    _publish_notification_flags()
+
+
+# Whether order events should be notified. Read on every order transition, so they are
+# published as plain booleans whenever the config is (re)loaded instead of being
+# looked up in the nested config dict each time.
+NOTIFY_SUBMIT = False
+NOTIFY_CANCEL = False
+NOTIFY_EXEC = False
+
+
+def _publish_notification_flags() -> None:
+    global NOTIFY_SUBMIT, NOTIFY_CANCEL, NOTIFY_EXEC
+
+    events = config['env'].get('notifications', {}).get('events', {})
+    NOTIFY_SUBMIT = bool(events.get('submitted_orders', False))
+    NOTIFY_CANCEL = bool(events.get('cancelled_orders', False))
+    NOTIFY_EXEC = bool(events.get('executed_orders', False))
 
 
 backup_config = config.copy()
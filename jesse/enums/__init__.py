@@ -17,6 +17,17 @@ class order_statuses:
     LIQUIDATED = 'LIQUIDATED'
 
 
+# bit flag counterparts of order_statuses. Used internally by orders so that
+# status checks are a single bitwise AND instead of string comparisons.
+class order_status_codes:
+    ACTIVE = 1
+    CANCELED = 2
+    EXECUTED = 4
+    PARTIALLY_FILLED = 8
+    QUEUED = 16
+    LIQUIDATED = 32
+
+
 class timeframes:
     MINUTE_1 = '1m'
     MINUTE_3 = '3m'
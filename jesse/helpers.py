@@ -4,6 +4,7 @@ import os
 import random
 import string
 import sys
+import threading
 import uuid
 from typing import List, Tuple, Union, Any, Optional
 from pprint import pprint
@@ -13,6 +14,10 @@ import numpy as np
 
 CACHED_CONFIG = dict()
 
+# the timestamp of the event tick that is being processed. Set by the simulator's
+# event loop so that all orders of a tick share it instead of reading the clock.
+_tick_timestamp = threading.local()
+
 
 def app_currency() -> str:
     from jesse.routes import router
@@ -442,6 +447,11 @@ def now(force_fresh=False) -> int:
 
 
 def now_to_timestamp(force_fresh=False) -> int:
+    if not force_fresh:
+        tick_timestamp = getattr(_tick_timestamp, 'value', None)
+        if tick_timestamp is not None:
+            return tick_timestamp
+
     if not force_fresh and (not (is_live() or is_collecting_data() or is_importing_candles())):
         from jesse.store import store
         return store.app.time
@@ -453,6 +463,14 @@ def current_1m_candle_timestamp():
     return arrow.utcnow().floor('minute').int_timestamp * 1000
 
 
+def set_tick_timestamp(timestamp: Optional[int]) -> None:
+    """
+    Makes now_to_timestamp() return the given timestamp in the current thread.
+    Pass None to make it read the clock again.
+    """
+    _tick_timestamp.value = timestamp
+
+
 def np_ffill(arr: np.ndarray, axis: int = 0) -> np.ndarray:
     idx_shape = tuple([slice(None)] + [np.newaxis] * (len(arr.shape) - axis - 1))
     idx = np.where(~np.isnan(arr), np.arange(arr.shape[axis])[idx_shape], 0)
@@ -717,9 +735,18 @@ def style(msg_text: str, msg_style: str) -> str:
 
 
 def terminate_app() -> None:
+    # write the buffered orders while the database is still open
+    from jesse.services.order_write_buffer import order_write_buffer
+    try:
+        order_write_buffer.flush()
+    except Exception as e:
+        print(f'Failed to store orders into the database: {e}')
     # close the database
     from jesse.services.db import database
     database.close_connection()
+    # write the queued log records
+    from jesse.services.logger import stop_queue_listeners
+    stop_queue_listeners()
     # disconnect python from the OS
     os._exit(1)
 
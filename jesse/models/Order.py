@@ -1,19 +1,122 @@
+import operator
+
+import orjson
 from playhouse.postgres_ext import *
 
 import jesse.helpers as jh
 import jesse.services.logger as logger
 import jesse.services.selectors as selectors
-from jesse.config import config
+import jesse.config as config_module
 from jesse.services.notifier import notify
-from jesse.enums import order_statuses, order_submitted_via
-from jesse.services.db import database
-
-
-if database.is_closed():
-    database.open_connection()
-
-
-class Order(Model):
+from jesse.enums import sides, order_statuses, order_status_codes, order_submitted_via
+from jesse.services.order_write_buffer import order_write_buffer
+
+
+_STATUS_CODES = {
+    order_statuses.ACTIVE: order_status_codes.ACTIVE,
+    order_statuses.CANCELED: order_status_codes.CANCELED,
+    order_statuses.EXECUTED: order_status_codes.EXECUTED,
+    order_statuses.PARTIALLY_FILLED: order_status_codes.PARTIALLY_FILLED,
+    order_statuses.QUEUED: order_status_codes.QUEUED,
+    order_statuses.LIQUIDATED: order_status_codes.LIQUIDATED,
+}
+
+# bits of Order._flags: the low ones hold the status, the high ones where the order was submitted via
+_ACTIVE = order_status_codes.ACTIVE
+_CANCELED = order_status_codes.CANCELED
+_EXECUTED = order_status_codes.EXECUTED
+_PARTIAL = order_status_codes.PARTIALLY_FILLED
+_QUEUED = order_status_codes.QUEUED
+_STATUS_BITS = 0b111111
+# orders in these statuses can no longer be canceled or executed
+_TERMINAL = _CANCELED | _EXECUTED
+# the cancelled stream's lag may report queued orders as cancelled; those must be ignored too
+_STREAM_TERMINAL = _TERMINAL | _QUEUED
+_STOP_LOSS = 1 << 6
+_TAKE_PROFIT = 1 << 7
+
+_SUBMITTED_VIA_FLAGS = {
+    order_submitted_via.STOP_LOSS: _STOP_LOSS,
+    order_submitted_via.TAKE_PROFIT: _TAKE_PROFIT,
+}
+
+_SIDE_SIGNS = {sides.BUY: 1, sides.SELL: -1}
+
+# used for logging and notifying order submissions
+_SUBMISSION_TEXT = '{} order: {}, {}, {}, {}'
+_SUBMISSION_TEXT_WITH_PRICE = '{} order: {}, {}, {}, {}, ${}'
+
+# jesse.store imports this module, so the store is resolved on first use (see _get_store)
+store = None
+
+# attributes orders can be created with, and their default values
+_ATTRIBUTE_DEFAULTS = {
+    'id': None,
+    'trade_id': None,
+    'session_id': None,
+    'exchange_id': None,
+    'symbol': None,
+    'exchange': None,
+    'side': None,
+    'type': None,
+    'reduce_only': None,
+    'qty': None,
+    'filled_qty': 0,
+    'price': None,
+    'status': order_statuses.ACTIVE,
+    'created_at': None,
+    'executed_at': None,
+    'canceled_at': None,
+    'submitted_via': None,
+}
+
+
+def _compile_fast_init():
+    """
+    Generates the function that Order.__init__ uses to assign its attributes: one
+    plain statement per known attribute instead of a setattr() loop over the given
+    dict. Unknown keys are skipped.
+    """
+    lines = ['def _fast_init(self, d):', '    get = d.get', '    self._flags = 0']
+    for name, default in _ATTRIBUTE_DEFAULTS.items():
+        lines.append(f'    self.{name} = get({name!r}, {default!r})')
+    # vars is mutable, so each order needs its own dict
+    lines.append("    self.vars = d['vars'] if 'vars' in d else {}")
+
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    return namespace['_fast_init']
+
+
+def _get_store():
+    global store
+    if store is None:
+        from jesse.store import store as _store
+        store = _store
+    return store
+
+
+def _dumps_json(value) -> str:
+    if value == {}:
+        return '{}'
+    # numpy scalars and non-string keys are accepted by the json module, so keep accepting them
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+
+class FastJSONField(JSONField):
+    """
+    JSONField that serializes with orjson and skips serialization entirely
+    for empty dicts, which is what most orders carry.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(_dumps_json, *args, **kwargs)
+
+
+class PersistedOrder(Model):
+    """
+    The database schema of orders. Only used for storing orders in live mode;
+    the rest of the app deals with the lightweight Order class below.
+    """
     # id generated by Jesse for database usage
     id = UUIDField(primary_key=True)
     trade_id = UUIDField(index=True, null=True)
@@ -22,7 +125,7 @@ class Order(Model):
     # id generated by market, used in live-trade mode
     exchange_id = CharField(null=True)
     # some exchanges might require even further info
-    vars = JSONField(default={})
+    vars = FastJSONField(default=dict)
     symbol = CharField()
     exchange = CharField()
     side = CharField()
@@ -36,67 +139,129 @@ class Order(Model):
     executed_at = BigIntegerField(null=True)
     canceled_at = BigIntegerField(null=True)
 
-    # needed in Jesse, but no need to store in database(?)
-    submitted_via = None
-
     class Meta:
         from jesse.services.db import database
 
         database = database.db
+        table_name = 'order'
         indexes = ((('trade_id', 'exchange', 'symbol', 'status', 'created_at'), False),)
 
-    def __init__(self, attributes: dict = None, should_silent=False, **kwargs) -> None:
-        Model.__init__(self, attributes=attributes, **kwargs)
 
+class Order:
+    # Orders are created and canceled by the thousands in backtests. Hence they are plain
+    # objects with __slots__ instead of peewee models, which saves the cost of field
+    # descriptors and of a per-instance __dict__.
+    __slots__ = (
+        'id', 'trade_id', 'session_id', 'exchange_id', 'vars', 'symbol', 'exchange', '_side', '_side_sign', 'type',
+        'reduce_only', 'qty', 'filled_qty', 'price', '_status', 'created_at', 'executed_at', 'canceled_at',
+        # needed in Jesse, but no need to store in database(?)
+        '_submitted_via',
+        # status and submitted_via as bit flags, kept in sync by their setters
+        '_flags',
+        # references resolved once instead of on every state transition
+        '_exchange', '_position',
+        # last to_json_bytes() output and the values it was built from
+        '_json_values', '_json_bytes',
+    )
+
+    # keys of to_dict, read in one go by a single attrgetter call
+    _TO_DICT_KEYS = (
+        'id', 'session_id', 'exchange_id', 'symbol', 'side', 'type', 'qty', 'filled_qty', 'price', 'status',
+        'created_at', 'canceled_at', 'executed_at',
+    )
+    _to_dict_values = operator.attrgetter(*_TO_DICT_KEYS)
+
+    _fast_init = _compile_fast_init()
+
+    def __init__(self, attributes: dict = None, should_silent=False, **kwargs) -> None:
         if attributes is None:
             attributes = {}
+        if kwargs:
+            attributes = {**attributes, **kwargs}
 
-        for a, value in attributes.items():
-            setattr(self, a, value)
+        self._fast_init(attributes)
+        self._position = None
+        self._json_values = None
+        self._json_bytes = None
 
         if self.created_at is None:
             self.created_at = jh.now_to_timestamp()
 
-        # if jh.is_live():
-        #     from jesse.store import store
-            # self.session_id = store.app.session_id
-            # self.save(force_insert=True)
+        is_live = jh.is_live()
+
+        if is_live:
+            self.session_id = _get_store().app.session_id
+            order_write_buffer.enqueue(self)
 
         if not should_silent:
-            if jh.is_live():
+            if is_live:
                 self.notify_submission()
 
-            if jh.is_debuggable('order_submission') and (self.is_active or self.is_queued):
-                txt = f'{"QUEUED" if self.is_queued else "SUBMITTED"} order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-                if self.price:
-                    txt += f', ${self.price}'
-                logger.info(txt)
+            if jh.is_debuggable('order_submission') and self._flags & (_ACTIVE | _QUEUED):
+                logger.info(self._submission_text('QUEUED' if self.is_queued else 'SUBMITTED'))
 
         # handle exchange balance for ordered asset
-        e = selectors.get_exchange(self.exchange)
-        e.on_order_submission(self)
+        self._exchange = selectors.get_exchange(self.exchange)
+        self._exchange.on_order_submission(self)
 
     def notify_submission(self) -> None:
-        if config['env']['notifications']['events']['submitted_orders'] and (self.is_active or self.is_queued):
-            txt = f'{"QUEUED" if self.is_queued else "SUBMITTED"} order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-            if self.price:
-                txt += f', ${self.price}'
-            notify(txt)
+        if not config_module.NOTIFY_SUBMIT:
+            return
+        if not self._flags & (_ACTIVE | _QUEUED):
+            return
+
+        notify(self._submission_text('QUEUED' if self.is_queued else 'SUBMITTED'))
+
+    def _submission_text(self, verb: str) -> str:
+        return self._fmt(self.symbol, self.type, self.side, self.qty, self.price, verb)
+
+    @staticmethod
+    def _fmt(symbol: str, typ: str, side: str, qty: float, price: float, verb: str) -> str:
+        if not price:
+            return _SUBMISSION_TEXT.format(verb, symbol, typ, side, qty)
+        return _SUBMISSION_TEXT_WITH_PRICE.format(verb, symbol, typ, side, qty, price)
 
     @property
     def is_canceled(self) -> bool:
-        return self.status == order_statuses.CANCELED
+        return bool(self._flags & _CANCELED)
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self._status = value
+        self._flags = (self._flags & ~_STATUS_BITS) | _STATUS_CODES.get(value, 0)
+
+    @property
+    def submitted_via(self) -> str:
+        return self._submitted_via
+
+    @submitted_via.setter
+    def submitted_via(self, value: str) -> None:
+        self._submitted_via = value
+        self._flags = (self._flags & _STATUS_BITS) | _SUBMITTED_VIA_FLAGS.get(value, 0)
+
+    @property
+    def side(self) -> str:
+        return self._side
+
+    @side.setter
+    def side(self, value: str) -> None:
+        self._side = value
+        self._side_sign = _SIDE_SIGNS.get(value)
 
     @property
     def is_active(self) -> bool:
-        return self.status == order_statuses.ACTIVE
+        return bool(self._flags & _ACTIVE)
 
     @property
     def is_cancellable(self):
         """
         orders that are either active or partially filled
         """
-        return self.is_active or self.is_partially_filled or self.is_queued
+        return bool(self._flags & (_ACTIVE | _PARTIAL | _QUEUED))
 
     @property
     def is_queued(self) -> bool:
@@ -107,53 +272,56 @@ class Order(Model):
 
         :return: bool
         """
-        return self.status == order_statuses.QUEUED
+        return bool(self._flags & _QUEUED)
 
     @property
     def is_new(self) -> bool:
-        return self.is_active
+        return bool(self._flags & _ACTIVE)
 
     @property
     def is_executed(self) -> bool:
-        return self.status == order_statuses.EXECUTED
+        return bool(self._flags & _EXECUTED)
 
     @property
     def is_filled(self) -> bool:
-        return self.is_executed
+        return bool(self._flags & _EXECUTED)
 
     @property
     def is_partially_filled(self) -> bool:
-        return self.status == order_statuses.PARTIALLY_FILLED
+        return bool(self._flags & _PARTIAL)
 
     @property
     def is_stop_loss(self):
-        return self.submitted_via == order_submitted_via.STOP_LOSS
+        return bool(self._flags & _STOP_LOSS)
 
     @property
     def is_take_profit(self):
-        return self.submitted_via == order_submitted_via.TAKE_PROFIT
+        return bool(self._flags & _TAKE_PROFIT)
 
     @property
     def to_dict(self):
-        return {
-            'id': self.id,
-            'session_id': self.session_id,
-            'exchange_id': self.exchange_id,
-            'symbol': self.symbol,
-            'side': self.side,
-            'type': self.type,
-            'qty': self.qty,
-            'filled_qty': self.filled_qty,
-            'price': self.price,
-            'status': self.status,
-            'created_at': self.created_at,
-            'canceled_at': self.canceled_at,
-            'executed_at': self.executed_at,
-        }
+        return dict(zip(self._TO_DICT_KEYS, self._to_dict_values(self)))
+
+    def to_json_bytes(self) -> bytes:
+        """
+        to_dict serialized with orjson, for API and WebSocket payloads. The output
+        is reused for as long as none of the serialized values has changed.
+        """
+        values = self._to_dict_values(self)
+        if values != self._json_values:
+            self._json_bytes = orjson.dumps(
+                dict(zip(self._TO_DICT_KEYS, values)),
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SERIALIZE_UUID
+            )
+            self._json_values = values
+        return self._json_bytes
 
     @property
     def position(self):
-        return selectors.get_position(self.exchange, self.symbol)
+        # exchange and symbol never change after the order is created
+        if self._position is None:
+            self._position = selectors.get_position(self.exchange, self.symbol)
+        return self._position
 
     @property
     def value(self) -> float:
@@ -161,16 +329,16 @@ class Order(Model):
 
     @property
     def remaining_qty(self) -> float:
-        return jh.prepare_qty(abs(self.qty) - abs(self.filled_qty), self.side)
+        remaining_qty = abs(abs(self.qty) - abs(self.filled_qty))
+        if self._side_sign is None:
+            return jh.prepare_qty(remaining_qty, self.side)
+        return self._side_sign * remaining_qty
 
     def queue(self):
         self.status = order_statuses.QUEUED
         self.canceled_at = None
         if jh.is_debuggable('order_submission'):
-            txt = f'QUEUED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-            if self.price:
-                txt += f', ${round(self.price, 2)}'
-                logger.info(txt)
+            logger.info(self._submission_text('QUEUED'))
         self.notify_submission()
 
     def resubmit(self):
@@ -183,71 +351,67 @@ class Order(Model):
         self.status = order_statuses.ACTIVE
         self.canceled_at = None
         if jh.is_debuggable('order_submission'):
-            txt = f'SUBMITTED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-            if self.price:
-                txt += f', ${self.price}'
-                logger.info(txt)
+            logger.info(self._submission_text('SUBMITTED'))
         self.notify_submission()
 
     def cancel(self, silent=False, source='') -> None:
-        if self.is_canceled or self.is_executed:
-            return
-
-        # to fix when the cancelled stream's lag causes cancellation of queued orders
-        if source == 'stream' and self.is_queued:
+        if self._flags & (_STREAM_TERMINAL if source == 'stream' else _TERMINAL):
             return
 
         self.canceled_at = jh.now_to_timestamp()
         self.status = order_statuses.CANCELED
 
-        # if jh.is_live():
-        #     self.save()
+        if jh.is_live():
+            order_write_buffer.enqueue(self)
 
         if not silent:
-            txt = f'CANCELED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-            if self.price:
-                txt += f', ${round(self.price, 2)}'
-            if jh.is_debuggable('order_cancellation'):
-                logger.info(txt)
-            if jh.is_live():
-                if config['env']['notifications']['events']['cancelled_orders']:
+            # only build the text if someone is going to read it
+            should_log = jh.is_debuggable('order_cancellation')
+            should_notify = jh.is_live() and config_module.NOTIFY_CANCEL
+            if should_log or should_notify:
+                txt = f'CANCELED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
+                if self.price:
+                    txt += f', ${self.price:.2f}'
+                if should_log:
+                    logger.info(txt)
+                if should_notify:
                     notify(txt)
 
         # handle exchange balance
-        e = selectors.get_exchange(self.exchange)
-        e.on_order_cancellation(self)
+        self._exchange.on_order_cancellation(self)
 
     def execute(self, silent=False) -> None:
-        if self.is_canceled or self.is_executed:
+        if self._flags & _TERMINAL:
             return
 
         self.executed_at = jh.now_to_timestamp()
         self.status = order_statuses.EXECUTED
 
-        # if jh.is_live():
-        #     self.save()
+        if jh.is_live():
+            order_write_buffer.enqueue(self)
 
         if not silent:
-            txt = f'EXECUTED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
-            if self.price:
-                txt += f', ${round(self.price, 2)}'
-            # log
-            if jh.is_debuggable('order_execution'):
-                logger.info(txt)
-            # notify
-            if jh.is_live():
-                if config['env']['notifications']['events']['executed_orders']:
+            # only build the text if someone is going to read it
+            should_log = jh.is_debuggable('order_execution')
+            should_notify = jh.is_live() and config_module.NOTIFY_EXEC
+            if should_log or should_notify:
+                txt = f'EXECUTED order: {self.symbol}, {self.type}, {self.side}, {self.qty}'
+                if self.price:
+                    txt += f', ${self.price:.2f}'
+                # log
+                if should_log:
+                    logger.info(txt)
+                # notify
+                if should_notify:
                     notify(txt)
 
         # log the order of the trade for metrics
-        from jesse.store import store
-        store.completed_trades.add_executed_order(self)
+        _get_store().completed_trades.add_executed_order(self)
 
         # handle exchange balance for ordered asset
-        e = selectors.get_exchange(self.exchange)
-        e.on_order_execution(self)
+        self._exchange.on_order_execution(self)
 
-        p = selectors.get_position(self.exchange, self.symbol)
+        p = self.position
         if p:
             p._on_executed_order(self)
 
@@ -255,29 +419,26 @@ class Order(Model):
         self.executed_at = jh.now_to_timestamp()
         self.status = order_statuses.PARTIALLY_FILLED
 
-        # if jh.is_live():
-        #     self.save()
+        if jh.is_live():
+            order_write_buffer.enqueue(self)
 
         if not silent:
-            txt = f"PARTIALLY FILLED: {self.symbol}, {self.type}, {self.side}, filled qty: {self.filled_qty}, remaining qty: {self.remaining_qty}, price: {self.price}"
-            # log
-            if jh.is_debuggable('order_execution'):
-                logger.info(txt)
-            # notify
-            if jh.is_live():
-                if config['env']['notifications']['events']['executed_orders']:
+            # only build the text if someone is going to read it
+            should_log = jh.is_debuggable('order_execution')
+            should_notify = jh.is_live() and config_module.NOTIFY_EXEC
+            if should_log or should_notify:
+                txt = f"PARTIALLY FILLED: {self.symbol}, {self.type}, {self.side}, filled qty: {self.filled_qty}, remaining qty: {self.remaining_qty}, price: {self.price}"
+                # log
+                if should_log:
+                    logger.info(txt)
+                # notify
+                if should_notify:
                     notify(txt)
 
         # log the order of the trade for metrics
-        from jesse.store import store
-        store.completed_trades.add_executed_order(self)
+        _get_store().completed_trades.add_executed_order(self)
 
-        p = selectors.get_position(self.exchange, self.symbol)
+        p = self.position
 
         if p:
             p._on_executed_order(self)
-
-
-# if database is open, create the table
-if database.is_open():
-    Order.create_table()
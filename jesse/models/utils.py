@@ -149,7 +149,7 @@ def store_completed_trade_into_db(completed_trade) -> None:
 
 def store_order_into_db(order) -> None:
     return
-    from jesse.models.Order import Order
+    from jesse.models.Order import PersistedOrder
 
     d = {
         'id': order.id,
@@ -171,7 +171,7 @@ def store_order_into_db(order) -> None:
     }
 
     def async_save() -> None:
-        Order.insert(**d).execute()
+        PersistedOrder.insert(**d).execute()
         if jh.is_debugging():
             logger.info(f'Stored the executed order record for {order.exchange}-{order.symbol} into database.')
 
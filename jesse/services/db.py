@@ -53,3 +53,18 @@ class Database:
 
 
 database = Database()
+
+
+def bootstrap() -> None:
+    """
+    Opens the database connection and prepares the order table, which unlike the
+    tables of the other models isn't created at import time. Called once, when a
+    live session starts.
+    """
+    database.open_connection()
+    if database.is_closed():
+        return
+
+    from jesse.models.Order import PersistedOrder
+    PersistedOrder.bind(database.db)
+    PersistedOrder.create_table()
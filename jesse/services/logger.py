@@ -1,11 +1,16 @@
 import jesse.helpers as jh
 from jesse.services.notifier import notify, notify_urgently
 from jesse.services.redis import sync_publish
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
 # store loggers in the dict because we might want to add more later
 LOGGERS = {}
+# listener threads writing the records of queued handlers, keyed by logger name
+QUEUE_LISTENERS = {}
 
 
 def _init_main_logger():
@@ -28,10 +33,49 @@ def _init_main_logger():
 
     new_logger = logging.getLogger(jh.app_mode())
     new_logger.setLevel(logging.INFO)
-    new_logger.addHandler(logging.FileHandler(filename, mode='w'))
+    _add_queued_file_handler(new_logger, filename, mode='w')
     LOGGERS[jh.app_mode()] = new_logger
 
 
+def _add_queued_file_handler(logger: logging.Logger, filename: str, mode: str) -> None:
+    """
+    Adds a handler that only puts records into a queue. The file is written
+    by a listener thread so the caller (e.g. the order lifecycle) never waits on disk I/O.
+    """
+    # replace the handler of a previous call instead of writing every record twice
+    if logger.name in QUEUE_LISTENERS:
+        handler, listener = QUEUE_LISTENERS.pop(logger.name)
+        logger.removeHandler(handler)
+        _stop_queue_listener(listener)
+
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    listener = logging.handlers.QueueListener(records, logging.FileHandler(filename, mode=mode))
+    listener.start()
+    logger.addHandler(handler)
+    QUEUE_LISTENERS[logger.name] = (handler, listener)
+
+
+def stop_queue_listeners() -> None:
+    """
+    Writes the records still waiting in the queues and stops their listener threads.
+    Must be called before os._exit() since that skips the atexit handlers.
+    """
+    while QUEUE_LISTENERS:
+        _, (_, listener) = QUEUE_LISTENERS.popitem()
+        _stop_queue_listener(listener)
+
+
+def _stop_queue_listener(listener: logging.handlers.QueueListener) -> None:
+    listener.stop()
+    # stop() doesn't close the file handlers the listener writes to
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(stop_queue_listeners)
+
+
 def create_disposable_logger(name):
     log_file = f"storage/logs/{name}.txt"
     os.makedirs('storage/logs', exist_ok=True)
@@ -31,8 +31,8 @@ def run():
     _trade(migrator)
 
     # create initial tables
-    from jesse.models import Candle, ClosedTrade, Log, Order, Option
-    database.db.create_tables([Candle, ClosedTrade, Log, Order])
+    from jesse.models import Candle, ClosedTrade, Log, PersistedOrder, Option
+    database.db.create_tables([Candle, ClosedTrade, Log, PersistedOrder])
 
     database.close_connection()
 
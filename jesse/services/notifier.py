@@ -1,3 +1,5 @@
+from collections import deque
+
 import requests
 from jesse.services.env import ENV_VALUES
 from jesse.services import logger
@@ -6,7 +8,8 @@ from timeloop import Timeloop
 from datetime import timedelta
 
 
-MSG_QUEUE = []
+# appended to by the trading thread, drained by the notifier loop's thread
+MSG_QUEUE = deque()
 
 
 def start_notifier_loop():
@@ -20,7 +23,7 @@ def start_notifier_loop():
     @tl.job(interval=timedelta(seconds=0.5))
     def handle_time():
         if len(MSG_QUEUE) > 0:
-            msg = MSG_QUEUE.pop(0)
+            msg = MSG_QUEUE.popleft()
             if msg['type'] == 'info':
                 _telegram(msg['content'])
                 _discord(msg['content'])
@@ -0,0 +1,179 @@
+import atexit
+import threading
+import time
+import weakref
+
+import psycopg2
+from psycopg2.extras import execute_batch
+
+from jesse.services import logger
+
+
+class OrderWriteBuffer:
+    """
+    Collects order rows in memory and writes them to the database in batches
+    instead of firing one INSERT/UPDATE query per order state transition.
+    """
+
+    def __init__(self, flush_interval: float = 0.05, max_rows: int = 1000, max_retry_interval: float = 5) -> None:
+        # seconds between two flushes of the background thread
+        self.flush_interval = flush_interval
+        # upper bound of the wait between two retries while the database is failing
+        self.max_retry_interval = max_retry_interval
+        # flush right away once this many rows are pending
+        self.max_rows = max_rows
+        # pending rows keyed by order id. Since every row is a full snapshot
+        # of the order, only its latest status transition needs to be written.
+        self._rows = {}
+        self._lock = threading.Lock()
+        # only one flush runs at a time, so a flush on exit waits for the background one
+        self._flush_lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._thread = None
+        # connections that "order_upsert" has been prepared on. peewee keeps one
+        # connection per thread, so the background thread and a flush on exit use different ones.
+        self._prepared_connections = weakref.WeakSet()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def enqueue(self, order) -> None:
+        row = _order_to_row(order)
+
+        with self._lock:
+            self._rows[row['id']] = row
+            pending_count = len(self._rows)
+
+        if self._thread is None:
+            self._start()
+
+        if pending_count >= self.max_rows:
+            self._wake_up.set()
+
+    def flush(self) -> None:
+        from jesse.services.db import database
+
+        with self._flush_lock:
+            db = database.db
+
+            with self._lock:
+                rows = self._rows
+                self._rows = {}
+
+            # nothing to write into (unit tests, backtests, etc.)
+            if db is None or not rows:
+                return
+
+            try:
+                self._write(db, list(rows.values()))
+            except _BAD_ROW_ERRORS:
+                # some row can't be stored at all; write them one by one
+                # so it doesn't keep the rest of the batch out of the database
+                self._write_one_by_one(db, rows)
+            except Exception:
+                self._restore(rows)
+                raise
+
+    def _write_one_by_one(self, db, rows: dict) -> None:
+        items = list(rows.items())
+        for i, (order_id, row) in enumerate(items):
+            try:
+                self._write(db, [row])
+            except _BAD_ROW_ERRORS as e:
+                _log_error(f'Dropped order {order_id} that could not be stored into the database: {e}')
+            except Exception:
+                self._restore(dict(items[i:]))
+                raise
+
+    def _restore(self, rows: dict) -> None:
+        # keep the rows for the next flush, unless a newer
+        # snapshot of the same order has been enqueued meanwhile
+        with self._lock:
+            for order_id, row in rows.items():
+                self._rows.setdefault(order_id, row)
+
+    def _write(self, db, rows: list) -> None:
+        values = [_row_to_values(r) for r in rows]
+        # connection state is per thread in peewee; this connects the current thread if needed
+        connection = db.connection()
+        if connection not in self._prepared_connections:
+            db.execute_sql(_prepare_sql())
+            self._prepared_connections.add(connection)
+
+        with db.atomic():
+            cursor = db.cursor()
+            # sends up to max_rows EXECUTE statements per round trip, each
+            # one reusing the plan of the prepared statement
+            execute_batch(cursor, _execute_sql(len(values[0])), values, page_size=self.max_rows)
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        # write whatever is left before the process exits
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        retry_interval = 0
+        while True:
+            if retry_interval:
+                # not woken up by enqueue() so a full buffer doesn't hammer a failing database
+                time.sleep(retry_interval)
+            else:
+                self._wake_up.wait(self.flush_interval)
+            self._wake_up.clear()
+            try:
+                self.flush()
+                retry_interval = 0
+            except Exception as e:
+                retry_interval = min(max(retry_interval * 2, self.flush_interval), self.max_retry_interval)
+                _log_error(f'Failed to store orders into the database, retrying in {retry_interval}s: {e}')
+
+
+# errors caused by the content of a row (e.g. a NULL in a NOT NULL column or
+# vars that can't be serialized), which retrying the same row can't fix
+_BAD_ROW_ERRORS = (psycopg2.IntegrityError, psycopg2.DataError, TypeError, ValueError)
+
+
+def _log_error(msg: str) -> None:
+    # the database may be the thing that is failing, and logging an error stores it
+    # there too. The background thread must survive that, and it must not flood the
+    # notification queue with one message per retry.
+    try:
+        logger.error(msg, send_notification=False)
+    except Exception:
+        print(msg)
+
+
+def _order_to_row(order) -> dict:
+    from jesse.models.Order import PersistedOrder
+
+    return {name: getattr(order, name) for name in PersistedOrder._meta.sorted_field_names}
+
+
+def _row_to_values(row: dict) -> tuple:
+    from jesse.models.Order import PersistedOrder
+
+    values = dict(row)
+    values['vars'] = PersistedOrder.vars.dumps(values['vars'])
+    return tuple(values.values())
+
+
+def _prepare_sql() -> str:
+    from jesse.models.Order import PersistedOrder
+
+    columns = [f'"{f.column_name}"' for f in PersistedOrder._meta.sorted_fields]
+    placeholders = [f'${i}' for i in range(1, len(columns) + 1)]
+    updates = [f'{c} = EXCLUDED.{c}' for c in columns if c != '"id"']
+
+    return (
+        f'PREPARE order_upsert AS INSERT INTO "{PersistedOrder._meta.table_name}" ({", ".join(columns)}) '
+        f'VALUES ({", ".join(placeholders)}) '
+        f'ON CONFLICT ("id") DO UPDATE SET {", ".join(updates)}'
+    )
+
+
+def _execute_sql(columns_count: int) -> str:
+    return f'EXECUTE order_upsert ({", ".join(["%s"] * columns_count)})'
+
+
+order_write_buffer = OrderWriteBuffer()
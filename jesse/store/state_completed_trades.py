@@ -1,4 +1,3 @@
-import numpy as np
 from jesse.models import Position, ClosedTrade, Order
 import jesse.helpers as jh
 from jesse.models.utils import store_completed_trade_into_db
@@ -50,10 +49,11 @@ class ClosedTrades:
         used for correct trade-metrics calculations in persistency support for live mode.
         """
         t = self._get_current_trade(exchange, symbol)
+        # a plain tuple is enough: DynamicNumpyArray copies it into its own array
         if side == sides.BUY:
-            t.buy_orders.append(np.array([abs(qty), price]))
+            t.buy_orders.append((abs(qty), price))
         elif side == sides.SELL:
-            t.sell_orders.append(np.array([abs(qty), price]))
+            t.sell_orders.append((abs(qty), price))
         else:
             raise Exception(f"Invalid order side: {side}")
 
@@ -0,0 +1,33 @@
+import jesse.config as config_module
+from jesse.config import config, reset_config, set_config
+
+
+def test_set_config_publishes_order_notification_flags_in_live_mode():
+    reset_config()
+    config['app']['trading_mode'] = 'livetrade'
+    try:
+        set_config({
+            'warm_up_candles': config['env']['data']['warmup_candles_num'],
+            'logging': config['env']['logging'],
+            'exchanges': {},
+            'notifications': {
+                'events': {
+                    'submitted_orders': True,
+                    'cancelled_orders': False,
+                    'executed_orders': True,
+                }
+            },
+            'persistency': config['env']['data']['persistency'],
+            'generate_candles_from_1m': config['env']['data']['generate_candles_from_1m'],
+        })
+
+        assert config_module.NOTIFY_SUBMIT is True
+        assert config_module.NOTIFY_CANCEL is False
+        assert config_module.NOTIFY_EXEC is True
+    finally:
+        config['app']['trading_mode'] = ''
+        reset_config()
+
+    assert config_module.NOTIFY_SUBMIT is False
+    assert config_module.NOTIFY_CANCEL is False
+    assert config_module.NOTIFY_EXEC is False
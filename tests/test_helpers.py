@@ -315,6 +315,16 @@ def test_now_to_timestamp():
     assert jh.now_to_timestamp() == store.app.time
 
 
+def test_now_to_timestamp_returns_tick_timestamp_when_set():
+    from jesse.store import store
+    jh.set_tick_timestamp(1552309186171)
+    try:
+        assert jh.now_to_timestamp() == 1552309186171
+    finally:
+        jh.set_tick_timestamp(None)
+    assert jh.now_to_timestamp() == store.app.time
+
+
 def test_np_ffill():
     arr = np.array([0, 1, np.nan, np.nan])
     res = jh.np_ffill(arr)
@@ -1,3 +1,15 @@
+import json
+
+import numpy as np
+import orjson
+
+from jesse.config import reset_config
+from jesse.enums import exchanges, order_statuses, order_submitted_via
+from jesse.factories import fake_order
+from jesse.models import Order
+from jesse.models.Order import PersistedOrder
+from jesse.routes import router
+from jesse.store import store
 from jesse.testing_utils import single_route_backtest
 
 
@@ -11,3 +23,74 @@ def test_order_is_take_profit_property():
 
 def test_order_value_property():
     single_route_backtest('TestOrderValueProperty')
+
+
+def set_up():
+    reset_config()
+    router.initiate([
+        {'exchange': exchanges.SANDBOX, 'symbol': 'BTC-USD', 'timeframe': '1m', 'strategy': 'TestVanillaStrategy'}
+    ])
+    store.reset()
+
+
+def test_order_status_predicates():
+    set_up()
+
+    o = fake_order()
+    assert o.status == order_statuses.ACTIVE
+    assert o.is_active and o.is_new and o.is_cancellable
+    assert not (o.is_canceled or o.is_executed or o.is_queued or o.is_partially_filled)
+
+    o.submitted_via = order_submitted_via.STOP_LOSS
+    assert o.is_stop_loss and not o.is_take_profit
+
+    o.status = order_statuses.PARTIALLY_FILLED
+    assert o.is_partially_filled and o.is_cancellable and not o.is_active
+    # changing the status must keep the submitted_via flag
+    assert o.is_stop_loss
+
+    o.status = order_statuses.EXECUTED
+    assert o.is_executed and o.is_filled and not o.is_cancellable
+
+
+def test_order_init_assigns_defaults_and_skips_unknown_attributes():
+    set_up()
+
+    o1 = Order({'symbol': 'BTC-USD', 'exchange': exchanges.SANDBOX, 'side': 'buy', 'qty': 1, 'price': 50, 'unknown': 1})
+    o2 = Order({'symbol': 'BTC-USD', 'exchange': exchanges.SANDBOX, 'side': 'sell', 'qty': -1, 'price': 60})
+
+    assert o1.status == order_statuses.ACTIVE
+    assert o1.filled_qty == 0
+    assert o1.executed_at is None
+    assert not hasattr(o1, 'unknown')
+    assert o1.vars == {} and o1.vars is not o2.vars
+    assert o2.remaining_qty == -1
+
+
+def test_order_to_json_bytes():
+    set_up()
+
+    o = fake_order()
+    assert orjson.loads(o.to_json_bytes()) == o.to_dict
+    assert o.to_json_bytes() is o.to_json_bytes()
+
+    o.status = order_statuses.CANCELED
+    o.canceled_at = 1552309186171
+    assert orjson.loads(o.to_json_bytes()) == o.to_dict
+
+
+def test_stream_cancellation_does_not_cancel_a_queued_order():
+    set_up()
+
+    o = fake_order({'status': order_statuses.QUEUED})
+    o.cancel(source='stream')
+    assert o.is_queued and o.canceled_at is None
+
+    o.cancel()
+    assert o.is_canceled and o.canceled_at is not None
+
+
+def test_persisted_order_vars_serializes_what_the_json_module_accepts():
+    value = {'a': np.float64(1.5), 'b': np.int64(2), 1: [np.array([1, 2])[0]]}
+    assert json.loads(PersistedOrder.vars.dumps(value)) == {'a': 1.5, 'b': 2, '1': [1]}
+    assert PersistedOrder.vars.dumps({}) == '{}'
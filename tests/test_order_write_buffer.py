@@ -0,0 +1,234 @@
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+from playhouse.postgres_ext import PostgresqlExtDatabase
+
+import jesse.helpers as jh
+from jesse.config import config, reset_config
+from jesse.enums import exchanges, order_statuses
+from jesse.factories import fake_order
+from jesse.models.Order import PersistedOrder
+from jesse.routes import router
+from jesse.services import order_write_buffer as order_write_buffer_module
+from jesse.services.db import database
+from jesse.services.order_write_buffer import OrderWriteBuffer
+from jesse.store import store
+
+
+def set_up():
+    reset_config()
+    config['app']['trading_exchanges'] = [exchanges.SANDBOX]
+    config['app']['trading_symbols'] = ['BTC-USD']
+    config['app']['considering_exchanges'] = [exchanges.SANDBOX]
+    routes = [
+        {'exchange': exchanges.SANDBOX, 'symbol': 'BTC-USD', 'timeframe': '1m', 'strategy': 'TestVanillaStrategy'}
+    ]
+    router.initiate(routes)
+    store.reset()
+
+
+def storable_order():
+    o = fake_order()
+    o.session_id = jh.generate_unique_id()
+    o.reduce_only = False
+    return o
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+class FakeWriter:
+    """
+    Stands in for OrderWriteBuffer._write: stores rows into a dict, refuses rows
+    without a session_id like the NOT NULL column does, and fails as a whole
+    while the "database" is down.
+    """
+
+    def __init__(self):
+        self.stored = {}
+        self.is_down = False
+
+    def __call__(self, db, rows):
+        if self.is_down:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        if any(r['session_id'] is None for r in rows):
+            raise psycopg2.IntegrityError('null value in column "session_id"')
+        for r in rows:
+            self.stored[r['id']] = r
+
+
+@pytest.fixture
+def fake_writer(monkeypatch):
+    writer = FakeWriter()
+    monkeypatch.setattr(database, 'db', object())
+    monkeypatch.setattr(OrderWriteBuffer, '_write', lambda self, db, rows: writer(db, rows))
+    return writer
+
+
+def test_enqueue_keeps_only_the_latest_row_of_each_order():
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=60)
+
+    o1 = fake_order()
+    o2 = fake_order()
+    buffer.enqueue(o1)
+    buffer.enqueue(o2)
+    o1.status = order_statuses.CANCELED
+    buffer.enqueue(o1)
+
+    assert len(buffer) == 2
+    assert buffer._rows[o1.id]['status'] == order_statuses.CANCELED
+    assert buffer._rows[o2.id]['status'] == order_statuses.ACTIVE
+
+
+def test_flush_drops_pending_rows_without_a_database():
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=60)
+
+    buffer.enqueue(fake_order())
+    buffer.flush()
+
+    assert len(buffer) == 0
+
+
+def test_flush_drops_rows_that_can_not_be_stored_and_writes_the_rest(fake_writer):
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=60)
+
+    bad = fake_order()
+    good = storable_order()
+    buffer.enqueue(bad)
+    buffer.enqueue(good)
+    buffer.flush()
+
+    assert len(buffer) == 0
+    assert list(fake_writer.stored) == [good.id]
+
+
+def test_flush_keeps_rows_while_the_database_is_down(fake_writer):
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=60)
+
+    o1 = storable_order()
+    o2 = storable_order()
+    buffer.enqueue(o1)
+    buffer.enqueue(o2)
+
+    fake_writer.is_down = True
+    write = OrderWriteBuffer._write
+
+    def write_while_o1_changes(self, db, rows):
+        o1.status = order_statuses.CANCELED
+        buffer.enqueue(o1)
+        write(self, db, rows)
+
+    OrderWriteBuffer._write = write_while_o1_changes
+    try:
+        with pytest.raises(psycopg2.OperationalError):
+            buffer.flush()
+    finally:
+        OrderWriteBuffer._write = write
+
+    # the failed row of o2 is back, while o1 keeps its newer snapshot
+    assert len(buffer) == 2
+    assert buffer._rows[o1.id]['status'] == order_statuses.CANCELED
+    assert buffer._rows[o2.id]['status'] == order_statuses.ACTIVE
+
+    fake_writer.is_down = False
+    buffer.flush()
+
+    assert len(buffer) == 0
+    assert fake_writer.stored[o1.id]['status'] == order_statuses.CANCELED
+    assert fake_writer.stored[o2.id]['status'] == order_statuses.ACTIVE
+
+
+def test_background_thread_survives_a_failing_database_and_logger(fake_writer, monkeypatch):
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=0.01, max_retry_interval=0.05)
+
+    logged = []
+
+    def failing_logger(msg, send_notification=True):
+        logged.append(send_notification)
+        raise psycopg2.OperationalError('could not store the log')
+
+    monkeypatch.setattr(order_write_buffer_module.logger, 'error', failing_logger)
+
+    fake_writer.is_down = True
+    o = storable_order()
+    buffer.enqueue(o)
+    wait_until(lambda: len(logged) >= 3)
+
+    assert buffer._thread.is_alive()
+    assert not any(logged)
+
+    fake_writer.is_down = False
+    wait_until(lambda: o.id in fake_writer.stored)
+    assert len(buffer) == 0
+
+
+# The tests below need a PostgreSQL server. They only run when JESSE_TEST_POSTGRES
+# holds a connection string (e.g. "dbname=jesse_db user=jesse_user password=password host=127.0.0.1"),
+# and work inside a schema of their own which is dropped afterwards.
+@contextmanager
+def throwaway_database():
+    dsn = os.environ.get('JESSE_TEST_POSTGRES')
+    if not dsn:
+        pytest.skip('set JESSE_TEST_POSTGRES to run the tests against PostgreSQL')
+
+    params = psycopg2.extensions.parse_dsn(dsn)
+    schema = f'jesse_test_{uuid.uuid4().hex}'
+    db = PostgresqlExtDatabase(params.pop('dbname'), options=f'-c search_path={schema}', **params)
+    db.execute_sql(f'CREATE SCHEMA "{schema}"')
+
+    previous_db = database.db
+    previous_model_db = PersistedOrder._meta.database
+    database.db = db
+    PersistedOrder.bind(db)
+    PersistedOrder.create_table()
+    try:
+        yield db
+    finally:
+        database.db = previous_db
+        PersistedOrder.bind(previous_model_db)
+        db.execute_sql(f'DROP SCHEMA "{schema}" CASCADE')
+        db.close()
+
+
+def test_background_thread_writes_orders_into_the_database():
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=0.01)
+
+    with throwaway_database():
+        o = storable_order()
+        buffer.enqueue(o)
+
+        wait_until(lambda: PersistedOrder.select().where(PersistedOrder.id == o.id).exists())
+
+        assert len(buffer) == 0
+        assert PersistedOrder.get_by_id(o.id).status == order_statuses.ACTIVE
+
+
+def test_flush_drops_rows_the_database_refuses():
+    set_up()
+    buffer = OrderWriteBuffer(flush_interval=60)
+
+    with throwaway_database():
+        # session_id is NOT NULL, so this row is refused
+        bad = fake_order()
+        bad.reduce_only = False
+        good = storable_order()
+        buffer.enqueue(bad)
+        buffer.enqueue(good)
+        buffer.flush()
+
+        assert len(buffer) == 0
+        assert [str(o.id) for o in PersistedOrder.select()] == [good.id]